@@ -1,3 +1,18 @@
-
 class APIStatusError(Exception):
     """Исключения при ошибках запросов к API Яндекс Домашка."""
+
+    def __init__(self, message='', status_code=None, url=None, params=None):
+        """Сохранение подробностей неудачного запроса."""
+        super().__init__(message)
+        self.status_code = status_code
+        self.url = url
+        self.params = params
+
+    def __str__(self):
+        """Текст ошибки: сообщение или код ответа с параметрами запроса."""
+        if self.status_code is None:
+            return super().__str__()
+        return (
+            f'Ошибка запроса. Статус-код: {self.status_code}. '
+            f'URL: {self.url}, params: {self.params}'
+        )
@@ -1,5 +1,8 @@
+import hashlib
 import logging
 import os
+import random
+import re
 import time
 import telebot
 import sys
@@ -8,30 +11,67 @@ from http import HTTPStatus
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 from telebot import TeleBot
 
 from exceptions import APIStatusError
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+__all__ = [
+    'ENDPOINT',
+    'HEADERS',
+    'HOMEWORK_VERDICTS',
+    'RETRY_PERIOD',
+    'check_response',
+    'check_tokens',
+    'get_api_answer',
+    'main',
+    'parse_status',
+    'send_message',
+]
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
-REQUIRED_TOKENS = [
-    'PRACTICUM_TOKEN',
-    'TELEGRAM_TOKEN',
-    'TELEGRAM_CHAT_ID'
-]
-REQUIRED_API_KEYS = [
+REQUIRED_API_KEYS = frozenset({
     'homework_name',
     'status'
-
-]
-
-RETRY_PERIOD = 600
+})
+
+RETRY_PERIOD = int(os.getenv('RETRY_PERIOD', '600'))
+MAX_RETRY_PERIOD = int(os.getenv('MAX_RETRY_PERIOD', RETRY_PERIOD * 3))
+RETRY_JITTER = 0.5
+# Telegram принимает не больше 4096 символов, оставляем запас.
+MAX_MESSAGE_LENGTH = 4000
+REQUEST_TIMEOUT = (
+    float(os.getenv('CONNECT_TIMEOUT', '5')),
+    float(os.getenv('READ_TIMEOUT', '30'))
+)
+TELEGRAM_READ_TIMEOUT = float(os.getenv('TELEGRAM_READ_TIMEOUT', '15'))
+# TeleBot держит свою сессию к api.telegram.org; продлеваем её жизнь,
+# чтобы отправка сообщений не открывала соединение заново.
+TELEGRAM_SESSION_TTL = 3600
+CURSOR_FILE = os.getenv('CURSOR_FILE', '/tmp/homework_bot.cursor')
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+# Заголовок авторизации на момент импорта. Без токена он не собирается:
+# запрос с «OAuth None» заведомо завершится ошибкой 401. Сами запросы
+# строят заголовок из текущего значения PRACTICUM_TOKEN.
+HEADERS = (
+    {'Authorization': f'OAuth {PRACTICUM_TOKEN}'} if PRACTICUM_TOKEN else {}
+)
+
+# Одна сессия на весь процесс: соединение с API переиспользуется
+# между опросами (keep-alive) без повторного TCP/TLS рукопожатия.
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
 
 
 HOMEWORK_VERDICTS = {
@@ -39,94 +79,142 @@ HOMEWORK_VERDICTS = {
     'reviewing': 'Работа взята на проверку ревьюером.',
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
+_ALLOWED_STATUSES = frozenset(HOMEWORK_VERDICTS)
+_TOKEN_RE = re.compile(r'[A-Za-z0-9_:.\-]+')
+
+# Пустой ответ API распознаётся без разбора всего JSON. Шаблон описывает
+# тело целиком: объект ровно из двух ключей в любом порядке.
+_EMPTY_ANSWER_RE = re.compile(
+    rb'\s*\{\s*(?:'
+    rb'"homeworks"\s*:\s*\[\s*\]\s*,\s*"current_date"\s*:\s*(\d+)'
+    rb'|"current_date"\s*:\s*(\d+)\s*,\s*"homeworks"\s*:\s*\[\s*\]'
+    rb')\s*\}\s*'
+)
+_MSG_TEMPLATE = 'Изменился статус проверки работы "{}". {}'.format
 
 
 def check_tokens():
     """Проверка наличия токенов окружения."""
+    tokens = {
+        'PRACTICUM_TOKEN': PRACTICUM_TOKEN,
+        'TELEGRAM_TOKEN': TELEGRAM_TOKEN,
+        'TELEGRAM_CHAT_ID': TELEGRAM_CHAT_ID
+    }
     missing_tokens = [
         name
-        for name in REQUIRED_TOKENS
-        if not globals()[name]
+        for name, value in tokens.items()
+        if not (value and _TOKEN_RE.fullmatch(value))
     ]
 
     if missing_tokens:
         message = (
-            'Отсутствует обязательные ременные окружения: '
+            'Отсутствуют или некорректны обязательные переменные окружения: '
             f'{", ".join(missing_tokens)}'
         )
-        logging.critical(message)
+        logger.critical(message)
         raise ValueError(message)
 
-    logging.info('Все необходимые переменные окружения присутствуют.')
+    logger.info('Все необходимые переменные окружения присутствуют.')
 
 
 def send_message(bot, message):
     """Отправка сообщения на запрос."""
-    logging.info('Отправляем сообщение.')
+    logger.debug('Отправляем сообщение.')
+    if len(message) > MAX_MESSAGE_LENGTH:
+        message = message[:MAX_MESSAGE_LENGTH - 3] + '...'
 
     bot.send_message(
         chat_id=TELEGRAM_CHAT_ID,
         text=message
     )
-    logging.debug('Сообщение отправлено.')
+    logger.debug('Сообщение отправлено.')
+
+
+def _decode_answer(response):
+    """Разбор тела ответа API."""
+    body = response.content
+    empty_answer = _EMPTY_ANSWER_RE.fullmatch(body)
+    if empty_answer:
+        return {
+            'homeworks': [],
+            'current_date': int(
+                empty_answer.group(1) or empty_answer.group(2)
+            )
+        }
+
+    if orjson is None:
+        return response.json()
+    return orjson.loads(body)
 
 
 def get_api_answer(timestamp):
     """Запрос к API Практикума."""
-    logging.info(
-        f'Отправка запроса к API: {ENDPOINT}, '
-        f'headers: {HEADERS}, params="from_date": {timestamp}'
+    if not PRACTICUM_TOKEN:
+        raise APIStatusError('Не задан PRACTICUM_TOKEN, запрос не отправлен.')
+    logger.info(
+        'Отправка запроса к API: %s, params="from_date": %s',
+        ENDPOINT, timestamp
     )
     try:
-        response = requests.get(
+        response = SESSION.get(
             ENDPOINT,
-            headers=HEADERS,
-            params={'from_date': timestamp}
+            headers={'Authorization': f'OAuth {PRACTICUM_TOKEN}'},
+            params={'from_date': timestamp},
+            timeout=REQUEST_TIMEOUT
         )
+    except requests.Timeout as error:
+        raise APIStatusError(f'Превышено время ожидания ответа API: {error}')
     except requests.RequestException as error:
         raise APIStatusError(f'Сбой запроса к API: {error}')
 
     if response.status_code != HTTPStatus.OK:
         raise APIStatusError(
-            'Ошибка запроса.'
-            f'Статус-код: {response.status_code}. '
-            f'headers: {HEADERS}, params="from_date": {timestamp}'
+            status_code=response.status_code,
+            url=ENDPOINT,
+            params={'from_date': timestamp}
         )
 
-    logging.info('Запрос выполнен успешно.')
+    logger.info('Запрос выполнен успешно.')
 
-    return response.json()
+    return _decode_answer(response)
 
 
 def check_response(response):
-    """Проверка API на соответствие документации."""
-    logging.info('Проверяем ответ от API.')
+    """Проверка API на соответствие документации.
 
-    if not isinstance(response, dict):
+    Возвращает список домашних работ из ответа.
+    """
+    logger.debug('Проверяем ответ от API.')
+
+    if type(response) is not dict:
         raise TypeError(
             f'Полученный тип данных ({type(response)}) '
             'не соотвествует ожидаемому (dict)'
         )
     if 'homeworks' not in response:
         raise KeyError('Ключ "homeworks" отсутствует в ответе API.')
-    if not isinstance(response['homeworks'], list):
+    homeworks = response['homeworks']
+    if type(homeworks) is not list:
         raise TypeError(
-            f'Полученный тип данных ({type(response["homeworks"])})'
+            f'Полученный тип данных ({type(homeworks)}) '
             'не соотвествует ожидаемому (list)'
         )
-    logging.info('API соответствует документации.')
+    logger.info('API соответствует документации.')
+    return homeworks
 
 
 def parse_status(homework):
     """Сравнения статуса работы с значением из константы."""
-    logging.info('Проверяем статус домашней работы.')
+    logger.debug('Проверяем статус домашней работы.')
+
+    if type(homework) is not dict:
+        raise TypeError(
+            f'Полученный тип данных ({type(homework)}) '
+            'не соотвествует ожидаемому (dict)'
+        )
 
     # Ищем отсутствующие ключи
-    missing_keys = [
-        name
-        for name in REQUIRED_API_KEYS
-        if name not in homework
-    ]
+    missing_keys = sorted(REQUIRED_API_KEYS - homework.keys())
 
     # Проверяем наличие отсутствующих ключей
     if missing_keys:
@@ -138,7 +226,7 @@ def parse_status(homework):
     homework_status = homework['status']
 
     # Проверяем, что статус является одним из ожидаемых значений
-    if homework_status not in HOMEWORK_VERDICTS.keys():
+    if homework_status not in _ALLOWED_STATUSES:
         raise ValueError(
             'Недокументированный статус '
             f'домашней работы: {homework_status}'
@@ -146,63 +234,145 @@ def parse_status(homework):
 
     verdict = HOMEWORK_VERDICTS[homework_status]
 
-    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+    return _MSG_TEMPLATE(homework_name, verdict)
+
+
+def _build_messages(homeworks):
+    """Сообщения о новых статусах, каждое не длиннее MAX_MESSAGE_LENGTH.
+
+    Работа с некорректными данными не останавливает разбор остальных:
+    вместо её статуса в сообщение попадает описание ошибки.
+    """
+    messages = []
+    current = ''
+    for homework in homeworks:
+        try:
+            part = parse_status(homework)
+        except (KeyError, TypeError, ValueError) as error:
+            logger.error('Не удалось разобрать статус работы: %s', error)
+            part = f'Не удалось разобрать статус работы: {error}'
+        if current and len(current) + 2 + len(part) > MAX_MESSAGE_LENGTH:
+            messages.append(current)
+            current = part
+        else:
+            current = f'{current}\n\n{part}' if current else part
+    if current:
+        messages.append(current)
+    return messages
+
+
+def get_retry_delay(attempt):
+    """Пауза перед повторным запросом после неудачных попыток."""
+    delay = min(MAX_RETRY_PERIOD, RETRY_PERIOD * 2 ** min(attempt, 5))
+    return delay * (1 + random.random() * RETRY_JITTER)
+
+
+def load_timestamp():
+    """Чтение метки времени последнего успешного запроса с диска."""
+    try:
+        with open(CURSOR_FILE) as file:
+            return int(file.read())
+    except (OSError, ValueError):
+        logger.info('Сохранённая метка времени не найдена.')
+        return int(time.time())
+
+
+def save_timestamp(timestamp):
+    """Сохранение метки времени последнего успешного запроса на диск."""
+    try:
+        tmp_file = f'{CURSOR_FILE}.tmp'
+        with open(tmp_file, 'w') as file:
+            file.write(str(timestamp))
+        os.replace(tmp_file, CURSOR_FILE)
+    except OSError as error:
+        logger.warning('Не удалось сохранить метку времени: %s', error)
+
+
+def _error_digest(error):
+    """Отпечаток ошибки без изменчивых подробностей."""
+    normalized = f'{type(error).__name__}:{str(error)[:200]}'
+    return hashlib.blake2s(normalized.encode(), digest_size=8).digest()
+
+
+def _format_error(error):
+    """Текст уведомления о сбое для Telegram."""
+    message = f'Сбой в работе программы: {type(error).__name__}: {error}'
+    return message[:MAX_MESSAGE_LENGTH]
+
+
+def _report_error(bot, error, old_error_digest):
+    """Логирование сбоя и уведомление о нём, если он ещё не отправлялся.
+
+    Возвращает отпечаток последней отправленной ошибки.
+    """
+    logger.exception('Сбой в работе программы: %s', error)
+    error_digest = _error_digest(error)
+    if error_digest == old_error_digest:
+        return old_error_digest
+    with suppress(
+        telebot.apihelper.ApiException,
+        requests.exceptions.RequestException
+    ):
+        send_message(bot, _format_error(error))
+        return error_digest
+    return old_error_digest
 
 
 def main():
     """Основная логика работы бота."""
     check_tokens()
+    telebot.apihelper.SESSION_TIME_TO_LIVE = TELEGRAM_SESSION_TTL
+    telebot.apihelper.CONNECT_TIMEOUT = REQUEST_TIMEOUT[0]
+    telebot.apihelper.READ_TIMEOUT = TELEGRAM_READ_TIMEOUT
 
     bot = TeleBot(token=TELEGRAM_TOKEN)
-    timestamp = int(time.time())
-    old_message = ''
+    timestamp = load_timestamp()
+    old_error_digest = None
+    attempt = 0
 
     while True:
+        tick_start = time.monotonic()
+        delay = RETRY_PERIOD
         try:
             response = get_api_answer(timestamp)
-            check_response(response)
-            homework = response['homeworks']
+            attempt = 0
+            homework = check_response(response)
             if not homework:
-                logging.debug('Изменений статуса нет')
-                continue
-
-            new_message = parse_status(homework[0])
-            if new_message != old_message:
-                send_message(bot, new_message)
-                old_message = new_message
-            else:
-                logging.info(
-                    f'Новое сообщение идентично прошлому "{new_message}"'
-                )
+                logger.debug('Изменений статуса нет')
+            for message in _build_messages(homework):
+                send_message(bot, message)
+            timestamp = response.get('current_date', timestamp)
+            save_timestamp(timestamp)
+            # Итерация прошла без сбоев: следующий сбой снова сообщаем.
+            old_error_digest = None
 
         except (
             telebot.apihelper.ApiException,
             requests.exceptions.RequestException
         ) as error:
-            logging.exception(
-                f'Сбой при отправке сообщения в Telegram: {error}'
+            logger.exception(
+                'Сбой при отправке сообщения в Telegram: %s', error
             )
 
-        except Exception as error:
-            logging.exception(f'Сбой в работе программы: {error}')
+        except APIStatusError as error:
+            attempt += 1
+            delay = get_retry_delay(attempt)
+            old_error_digest = _report_error(bot, error, old_error_digest)
 
-            new_message = f'Сбой в работе программы: {error}'
-            if new_message != old_message:
-                with suppress(
-                    telebot.apihelper.ApiException,
-                    requests.exceptions.RequestException
-                ):
-                    send_message(bot, new_message)
-                    old_message = new_message
+        except Exception as error:
+            old_error_digest = _report_error(bot, error, old_error_digest)
 
         finally:
-            time.sleep(RETRY_PERIOD)
+            # Паузу отсчитываем от начала итерации, чтобы время работы
+            # не сдвигало расписание опросов.
+            pause = max(0.0, delay - (time.monotonic() - tick_start))
+            time.sleep(pause)
 
 
 if __name__ == '__main__':
     logging.basicConfig(
         format='%(asctime)s [%(levelname)s]-[%(funcName)s] %(message)s',
-        level=logging.DEBUG,
+        level=logging.INFO,
         handlers=[logging.StreamHandler(stream=sys.stdout)]
     )
     logging.getLogger("requests").setLevel(logging.WARNING)
@@ -1,3 +1,4 @@
+import json
 import logging
 import signal
 import re
@@ -98,6 +99,10 @@ class MockResponseGET:
         self.data = data if data is not None else default_data
         logging.warn(MockResponseGET.CALLED_LOG_MSG)
 
+    @property
+    def content(self):
+        return json.dumps(self.data).encode()
+
     def json(self):
         return self.data
 
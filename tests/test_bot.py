@@ -1,6 +1,8 @@
 import inspect
+import json
 import logging
 import platform
+import random
 import re
 import time
 from http import HTTPStatus
@@ -10,6 +12,7 @@ import requests
 import telebot
 
 import tests.check_utils as check_utils
+from exceptions import APIStatusError
 
 old_sleep = time.sleep
 
@@ -114,6 +117,12 @@ class TestHomework:
         )
     }
 
+    @pytest.fixture(autouse=True)
+    def cursor_file(self, monkeypatch, tmp_path, homework_module):
+        monkeypatch.setattr(
+            homework_module, 'CURSOR_FILE', str(tmp_path / 'cursor')
+        )
+
     @pytest.mark.timeout(1, method='thread')
     def test_homework_const(self, homework_module):
         for const in self.HOMEWORK_CONSTANTS:
@@ -203,7 +212,9 @@ class TestHomework:
                     'Проверьте, что в параметре `from_date` передано число.'
                 )
 
-        monkeypatch.setattr(requests, 'get', check_request_call)
+        monkeypatch.setattr(
+            homework_module.SESSION, 'get', check_request_call
+        )
         try:
             homework_module.get_api_answer(current_timestamp)
         except AssertionError:
@@ -228,7 +239,9 @@ class TestHomework:
                 current_timestamp=current_timestamp, **kwargs
             )
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(
+            homework_module.SESSION, 'get', mock_response_get
+        )
 
         result = homework_module.get_api_answer(current_timestamp)
         assert isinstance(result, dict), (
@@ -246,7 +259,9 @@ class TestHomework:
             self.HOMEWORK_FUNC_WITH_PARAMS_QTY[func_name]
         )
 
-        monkeypatch.setattr(requests, 'get', response)
+        monkeypatch.setattr(
+            homework_module.SESSION, 'get', response
+        )
         try:
             homework_module.get_api_answer(current_timestamp)
         except Exception:
@@ -270,7 +285,9 @@ class TestHomework:
         def mock_request_get_with_exception(*args, **kwargs):
             raise requests.RequestException('Something wrong')
 
-        monkeypatch.setattr(requests, 'get', mock_request_get_with_exception)
+        monkeypatch.setattr(
+            homework_module.SESSION, 'get', mock_request_get_with_exception
+        )
         try:
             homework_module.get_api_answer(current_timestamp)
         except requests.RequestException as e:
@@ -461,6 +478,20 @@ class TestHomework:
             else:
                 raise AssertionError(assert_message)
 
+    def test_check_tokens_rejects_malformed_token(
+            self, monkeypatch, homework_module
+    ):
+        for token in ('some token\n', 'токен12345'):
+            monkeypatch.setattr(homework_module, 'PRACTICUM_TOKEN', token)
+            with pytest.raises(ValueError):
+                homework_module.check_tokens()
+
+    def test_check_response_null_homeworks(self, homework_module):
+        with pytest.raises(TypeError):
+            homework_module.check_response(
+                {'homeworks': None, 'current_date': 123246}
+            )
+
     def test_send_message(
             self, monkeypatch, random_message, caplog, homework_module
     ):
@@ -495,6 +526,17 @@ class TestHomework:
                 'метод бота `send_message`.'
             )
 
+    def test_send_long_message_truncated(
+            self, monkeypatch, random_message, homework_module
+    ):
+        monkeypatch.setattr(homework_module, 'TELEGRAM_CHAT_ID', '12345')
+        bot = get_mock_telegram_bot(monkeypatch, random_message)
+        homework_module.send_message(bot, 'x' * 5000)
+        assert len(bot.text) <= homework_module.MAX_MESSAGE_LENGTH, (
+            'Убедитесь, что слишком длинное сообщение обрезается '
+            'до отправки в Telegram.'
+        )
+
     def test_bot_initialized_in_main(self, homework_module):
         func_name = 'main'
         check_utils.check_function(
@@ -566,6 +608,8 @@ class TestHomework:
             raise check_utils.BreakInfiniteLoop('break')
 
         monkeypatch.setattr(time, 'sleep', sleep_to_interrupt)
+        # Замораживаем часы, чтобы пауза не зависела от времени итерации.
+        monkeypatch.setattr(time, 'monotonic', lambda: 0.0)
         if mock_bot:
             def mock_telegram_bot(random_message=random_message, *args,
                                   **kwargs):
@@ -595,7 +639,7 @@ class TestHomework:
                 data=response_data
             ))
         monkeypatch.setattr(
-            requests,
+            homework_module.SESSION,
             'get',
             mock_response_get_with_new_status
         )
@@ -658,7 +702,7 @@ class TestHomework:
                     )
                 ]
                 assert log_record, (
-                    'Убедитесь, что бот использует функцию `requests.get()` '
+                    'Убедитесь, что бот использует метод `SESSION.get()` '
                     'для отправки запроса к API домашки.'
                 )
 
@@ -822,6 +866,294 @@ class TestHomework:
                     'возникновении ошибки отправки сообщения в Телеграм.'
                 ) from e
 
+    def run_main_iterations(
+            self, monkeypatch, homework_module, answers, failed_sends=0
+    ):
+        """
+        Run main() for len(answers) iterations. Each answer is either data
+        for an OK API response or an exception raised by the request.
+        The first `failed_sends` Telegram sends raise ApiException.
+        Return the sleep durations, the messages passed to send_message
+        and the headers of every API request.
+        """
+        monkeypatch.setattr(homework_module, 'PRACTICUM_TOKEN', 'sometoken')
+        monkeypatch.setattr(homework_module, 'TELEGRAM_TOKEN', '1234:abcdefg')
+        monkeypatch.setattr(homework_module, 'TELEGRAM_CHAT_ID', '12345')
+        monkeypatch.setattr(
+            homework_module, 'TeleBot', check_utils.MockTelegramBot
+        )
+        monkeypatch.setattr(time, 'monotonic', lambda: 0.0)
+        monkeypatch.setattr(random, 'random', lambda: 0.0)
+
+        iterations = len(answers)
+        answers = iter(answers)
+        sleeps = []
+        messages = []
+        request_headers = []
+
+        def mock_get(*args, **kwargs):
+            request_headers.append(kwargs.get('headers', {}))
+            answer = next(answers)
+            if isinstance(answer, Exception):
+                raise answer
+            return check_utils.MockResponseGET(
+                *args, http_status=HTTPStatus.OK, data=answer, **kwargs
+            )
+
+        def mock_send_message(bot, message):
+            messages.append(message)
+            if len(messages) <= failed_sends:
+                raise telebot.apihelper.ApiException(
+                    'Telegram is down', 'send_message', 500
+                )
+
+        def mock_sleep(secs):
+            sleeps.append(secs)
+            if len(sleeps) == iterations:
+                raise check_utils.BreakInfiniteLoop('break')
+
+        monkeypatch.setattr(homework_module.SESSION, 'get', mock_get)
+        monkeypatch.setattr(time, 'sleep', mock_sleep)
+        monkeypatch.setattr(
+            homework_module, 'send_message', mock_send_message
+        )
+        with pytest.raises(check_utils.BreakInfiniteLoop):
+            homework_module.main()
+        return sleeps, messages, request_headers
+
+    def test_main_resets_backoff_after_success(
+            self, monkeypatch, random_timestamp, homework_module
+    ):
+        empty_answer = {'homeworks': [], 'current_date': random_timestamp}
+        sleeps, _, _ = self.run_main_iterations(
+            monkeypatch, homework_module, [
+                requests.RequestException('down'),
+                requests.RequestException('down'),
+                empty_answer,
+                requests.RequestException('down'),
+            ]
+        )
+        assert sleeps == [
+            homework_module.get_retry_delay(1),
+            homework_module.get_retry_delay(2),
+            self.RETRY_PERIOD,
+            homework_module.get_retry_delay(1),
+        ], (
+            'Убедитесь, что после успешного запроса к API пауза '
+            'возвращается к `RETRY_PERIOD`, а отсчёт сбоев начинается заново.'
+        )
+
+    def test_main_retries_status_after_failed_send(
+            self, monkeypatch, data_with_new_hw_status, homework_module
+    ):
+        _, messages, _ = self.run_main_iterations(
+            monkeypatch, homework_module,
+            [data_with_new_hw_status, data_with_new_hw_status],
+            failed_sends=1
+        )
+        assert len(messages) == 2, (
+            'Убедитесь, что после сбоя отправки статус отправляется '
+            'повторно при следующем опросе.'
+        )
+
+    def test_get_api_answer_uses_current_token(
+            self, monkeypatch, random_timestamp, current_timestamp,
+            homework_module
+    ):
+        request_headers = []
+
+        def mock_get(*args, **kwargs):
+            request_headers.append(kwargs['headers'])
+            return check_utils.MockResponseGET(
+                *args, random_timestamp=random_timestamp, **kwargs
+            )
+
+        headers_before = dict(homework_module.HEADERS)
+        monkeypatch.setattr(homework_module, 'PRACTICUM_TOKEN', 'othertoken')
+        monkeypatch.setattr(homework_module.SESSION, 'get', mock_get)
+        homework_module.get_api_answer(current_timestamp)
+        assert request_headers[0]['Authorization'] == 'OAuth othertoken', (
+            'Убедитесь, что заголовок `Authorization` строится из текущего '
+            'значения `PRACTICUM_TOKEN`.'
+        )
+        assert homework_module.HEADERS == headers_before, (
+            'Не изменяйте константу `HEADERS` во время работы бота.'
+        )
+
+    def test_get_api_answer_without_token(
+            self, monkeypatch, current_timestamp, homework_module
+    ):
+        def mock_get(*args, **kwargs):
+            raise AssertionError('Запрос отправлен без PRACTICUM_TOKEN.')
+
+        monkeypatch.setattr(homework_module, 'PRACTICUM_TOKEN', None)
+        monkeypatch.setattr(homework_module.SESSION, 'get', mock_get)
+        with pytest.raises(APIStatusError):
+            homework_module.get_api_answer(current_timestamp)
+
+    def test_main_reports_repeated_error_after_recovery(
+            self, monkeypatch, random_timestamp, homework_module
+    ):
+        empty_answer = {'homeworks': [], 'current_date': random_timestamp}
+        _, messages, _ = self.run_main_iterations(
+            monkeypatch, homework_module, [
+                requests.RequestException('down'),
+                requests.RequestException('down'),
+                empty_answer,
+                requests.RequestException('down'),
+            ]
+        )
+        assert len(messages) == 2, (
+            'Убедитесь, что повтор той же ошибки подряд не отправляется, '
+            'а после успешного опроса о ней снова сообщается в Telegram.'
+        )
+
+    def test_build_messages_splits_long_batch(self, homework_module):
+        homeworks = [
+            {'homework_name': f'hw{number}_' + 'x' * 200, 'status': 'approved'}
+            for number in range(50)
+        ]
+        messages = homework_module._build_messages(homeworks)
+        assert len(messages) > 1 and all(
+            len(message) <= homework_module.MAX_MESSAGE_LENGTH
+            for message in messages
+        ), (
+            'Убедитесь, что длинный список статусов разбивается на '
+            'несколько сообщений не длиннее `MAX_MESSAGE_LENGTH`.'
+        )
+        text = '\n\n'.join(messages)
+        for homework in homeworks:
+            assert f'"{homework["homework_name"]}"' in text, (
+                'Убедитесь, что при разбиении на сообщения '
+                'не теряется ни один статус.'
+            )
+
+    def test_main_skips_invalid_homework(
+            self, monkeypatch, data_with_new_hw_status, homework_module
+    ):
+        data_with_new_hw_status['homeworks'].insert(
+            0, {'homework_name': 'broken', 'status': 'unknown'}
+        )
+        _, messages, _ = self.run_main_iterations(
+            monkeypatch, homework_module, [data_with_new_hw_status]
+        )
+        assert any(
+            self.HOMEWORK_VERDICTS['approved'] in message
+            for message in messages
+        ), (
+            'Убедитесь, что работа с недокументированным статусом не мешает '
+            'отправить статусы остальных работ.'
+        )
+        assert homework_module.load_timestamp() == (
+            data_with_new_hw_status['current_date']
+        ), (
+            'Убедитесь, что метка времени сдвигается, даже если одну из '
+            'работ не удалось разобрать.'
+        )
+
+    def test_retry_delay_backoff(self, homework_module):
+        delays = [
+            homework_module.get_retry_delay(attempt)
+            for attempt in range(1, 10)
+        ]
+        for delay in delays:
+            assert self.RETRY_PERIOD < delay <= (
+                homework_module.MAX_RETRY_PERIOD
+                * (1 + homework_module.RETRY_JITTER)
+            ), (
+                'Убедитесь, что после сбоя пауза растёт, но не превышает '
+                '`MAX_RETRY_PERIOD` с учётом разброса.'
+            )
+
+    def test_timestamp_persisted(self, random_timestamp, homework_module):
+        homework_module.save_timestamp(random_timestamp)
+        assert homework_module.load_timestamp() == random_timestamp, (
+            'Убедитесь, что сохранённая метка времени читается '
+            'при следующем запуске бота.'
+        )
+
+    def test_api_status_error_str(self):
+        assert str(APIStatusError('Сбой запроса к API')) == (
+            'Сбой запроса к API'
+        ), (
+            'Убедитесь, что без кода ответа `APIStatusError` выводит '
+            'переданное сообщение.'
+        )
+        error_text = str(APIStatusError(
+            status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            url='https://example.com/',
+            params={'from_date': 0}
+        ))
+        for detail in ('500', 'https://example.com/', 'from_date'):
+            assert detail in error_text, (
+                'Убедитесь, что текст `APIStatusError` содержит код ответа, '
+                'адрес и параметры запроса.'
+            )
+
+    @pytest.mark.parametrize('body', (
+        b'{"homeworks": [], "current_date": 1000198000}',
+        b'{"homeworks":[],"current_date":1000198000}',
+        b' {"current_date": 1000198000, "homeworks": []}\n',
+    ))
+    def test_decode_empty_answer_shortcut(
+            self, monkeypatch, body, homework_module
+    ):
+        class Response:
+            content = body
+
+            def json(self):
+                raise AssertionError('Пустой ответ разобран целиком.')
+
+        monkeypatch.setattr(homework_module, 'orjson', None)
+        assert homework_module._decode_answer(Response()) == (
+            json.loads(body)
+        ), (
+            'Убедитесь, что пустой ответ API без разбора JSON даёт тот же '
+            'словарь, что и полный разбор.'
+        )
+
+    def test_decode_answer_with_homeworks(
+            self, monkeypatch, data_with_new_hw_status, homework_module
+    ):
+        calls = []
+
+        class Response:
+            content = json.dumps(data_with_new_hw_status).encode()
+
+            def json(self):
+                calls.append(True)
+                return json.loads(self.content)
+
+        monkeypatch.setattr(homework_module, 'orjson', None)
+        result = homework_module._decode_answer(Response())
+        assert calls and result == data_with_new_hw_status, (
+            'Убедитесь, что ответ с домашними работами разбирается целиком.'
+        )
+
+    @pytest.mark.parametrize('body', (
+        b'[{"homeworks": [], "current_date": 1000198000}]',
+        b'{"data": {"homeworks": []}, "current_date": 1000198000}',
+        b'{"homeworks": [], "current_date": 1000198000, "extra": 1}',
+    ))
+    def test_decode_answer_shortcut_not_applied(
+            self, monkeypatch, body, homework_module
+    ):
+        calls = []
+
+        class Response:
+            content = body
+
+            def json(self):
+                calls.append(True)
+                return json.loads(self.content)
+
+        monkeypatch.setattr(homework_module, 'orjson', None)
+        result = homework_module._decode_answer(Response())
+        assert calls and result == json.loads(body), (
+            'Убедитесь, что без разбора JSON обрабатывается только ответ '
+            'вида `{"homeworks": [], "current_date": N}`.'
+        )
+
     def test_docstrings(self, homework_module):
         for func in self.HOMEWORK_FUNC_WITH_PARAMS_QTY:
             check_utils.check_docstring(homework_module, func)